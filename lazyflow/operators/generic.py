@@ -20,8 +20,12 @@
 # 		   http://ilastik.org/license/
 ###############################################################################
 # Python
+import collections
 import copy
 import logging
+import os
+import threading
+from functools import partial
 
 logger = logging.getLogger(__name__)
 
@@ -32,30 +36,105 @@ import vigra
 # lazyflow
 from lazyflow.graph import Operator, InputSlot, OutputSlot
 from lazyflow import roi
-from lazyflow.roi import roiToSlice, sliceToRoi, TinyVector, getIntersection, InvalidRoiException
-from lazyflow.request import RequestPool
+from lazyflow.roi import roiToSlice, sliceToRoi, TinyVector, InvalidRoiException
+from lazyflow.request import Request, RequestPool
 
 from typing import Tuple
 
 
 # Utility functions
 def axisTagsToString(axistags):
-    res = []
-    for axistag in axistags:
-        res.append(axistag.key)
-    return res
+    return [axistag.key for axistag in axistags]
 
 
 def popFlagsFromTheKey(key, axistags, flags):
-    d = dict(list(zip(axisTagsToString(axistags), key)))
+    return [k for axiskey, k in zip(axisTagsToString(axistags), key) if axiskey not in flags]
 
-    newKey = []
-    for flag in axisTagsToString(axistags):
-        if flag not in flags:
-            slice = d[flag]
-            newKey.append(slice)
 
-    return newKey
+def _max_channel_index(data):
+    """
+    Per-pixel index of the channel (last axis) holding the maximum value.
+
+    Same as numpy.argmax(data, axis=-1) (ties go to the lowest channel index,
+    the first NaN channel counts as the maximum), but computed with a running
+    maximum and stored in the smallest sufficient unsigned dtype instead of an
+    int64 array.
+    """
+    n_channels = data.shape[-1]
+    # The comparisons below never pick a NaN channel, leave data containing NaNs to argmax.
+    # (The sum is NaN if any value is, and only rarely otherwise, e.g. for inf - inf.)
+    if data.dtype.kind == "f" and numpy.isnan(numpy.sum(data)):
+        return numpy.argmax(data, axis=-1).astype(numpy.min_scalar_type(n_channels - 1))
+
+    if n_channels == 2:
+        # Common two-class case: a single comparison pass, no running maximum needed
+        return numpy.greater(data[..., 1], data[..., 0]).view(numpy.uint8)
+
+    index = numpy.zeros(data.shape[:-1], dtype=numpy.min_scalar_type(n_channels - 1))
+    if n_channels == 1:
+        return index
+
+    running_max = data[..., 0].copy()
+    is_greater = numpy.empty(index.shape, dtype=bool)
+    for k in range(1, n_channels):
+        numpy.greater(data[..., k], running_max, out=is_greater)
+        index[is_greater] = k
+        numpy.maximum(running_max, data[..., k], out=running_max)
+    return index
+
+
+def _channel_runs(channels):
+    """
+    Group a channel selection into runs of consecutive input channels.
+
+    Returns (runs, repeats):
+      runs: list of (in_start, in_stop, out_index), one per run of consecutive
+        (distinct) input channels. out_index is a slice if the run ends up in
+        consecutive output channels (in the same order), a list of output
+        channels otherwise.
+      repeats: list of (out_index, first_out_channel) for channels that are
+        selected more than once, to be copied from their first occurrence.
+        out_index holds all further occurrences, as a slice if they are
+        consecutive, a list of output channels otherwise.
+    """
+    first_out_channel = {}
+    repeated_out_channels = collections.defaultdict(list)
+    for out_channel, channel in enumerate(channels):
+        if channel in first_out_channel:
+            repeated_out_channels[first_out_channel[channel]].append(out_channel)
+        else:
+            first_out_channel[channel] = out_channel
+
+    runs = []
+    for channel in sorted(first_out_channel):
+        if runs and runs[-1][1] == channel:
+            runs[-1][1] = channel + 1
+            runs[-1][2].append(first_out_channel[channel])
+        else:
+            runs.append([channel, channel + 1, [first_out_channel[channel]]])
+
+    def as_index(out_channels):
+        if out_channels == list(range(out_channels[0], out_channels[-1] + 1)):
+            return slice(out_channels[0], out_channels[-1] + 1)
+        return out_channels
+
+    runs = [(in_start, in_stop, as_index(out_channels)) for in_start, in_stop, out_channels in runs]
+    repeats = [(as_index(out_channels), first) for first, out_channels in repeated_out_channels.items()]
+    return runs, repeats
+
+
+def _in_memory_array(slot):
+    """
+    The array assigned via setValue to slot (or to the input slot it is
+    connected to), or None if its data has to be requested.
+    """
+    # Requests to input slots connected to other input slots are simply relayed upstream
+    while isinstance(slot.upstream_slot, InputSlot):
+        slot = slot.upstream_slot
+    value = slot._value
+    if isinstance(value, numpy.ndarray) and not isinstance(value, numpy.ma.MaskedArray):
+        return value
+    return None
 
 
 class OpMultiArraySlicer2(Operator):
@@ -89,24 +168,25 @@ class OpMultiArraySlicer2(Operator):
         flag = self.AxisFlag.value
 
         indexAxis = self.Input.meta.axistags.index(flag)
+        # Cached for execute and propagateDirty
+        self._indexAxis = indexAxis
         inshape = list(self.Input.meta.shape)
         outshape = list(inshape)
         outshape.pop(indexAxis)
         outshape.insert(indexAxis, 1)
         outshape = tuple(outshape)
 
-        outaxistags = copy.copy(self.Input.meta.axistags)
+        # Output metadata is a modified copy of the input's metadata, identical for all slices
+        outmeta = self.Input.meta.copy()
+        outmeta.axistags = copy.copy(self.Input.meta.axistags)
+        outmeta.shape = outshape
 
         sliceIndexes = self.getSliceIndexes()
+        self._sliceIndexes = sliceIndexes
         self.Slices.resize(len(sliceIndexes))
 
         for oslot in self.Slices:
-            # Output metadata is a modified copy of the input's metadata
-            oslot.meta.assignFrom(self.Input.meta)
-            oslot.meta.axistags = outaxistags
-            oslot.meta.shape = outshape
-            if self.Input.meta.drange is not None:
-                oslot.meta.drange = self.Input.meta.drange
+            oslot.meta.assignFrom(outmeta)
 
     def getSliceIndexes(self):
         if self.SliceIndexes.ready():
@@ -120,29 +200,17 @@ class OpMultiArraySlicer2(Operator):
             return list(range(inshape[indexAxis]))
 
     def execute(self, slot, subindex, rroi, result):
-        key = roiToSlice(rroi.start, rroi.stop)
         index = subindex[0]
         # Index of the input slice this data will come from.
-        sliceIndex = self.getSliceIndexes()[index]
-
-        outshape = self.Slices[index].meta.shape
-        start, stop = roi.sliceToRoi(key, outshape)
-
-        start = list(start)
-        stop = list(stop)
-
-        flag = self.AxisFlag.value
-        indexAxis = self.Input.meta.axistags.index(flag)
-
-        start.pop(indexAxis)
-        stop.pop(indexAxis)
+        sliceIndex = self._sliceIndexes[index]
 
-        start.insert(indexAxis, sliceIndex)
-        stop.insert(indexAxis, sliceIndex + 1)
+        # Same roi as requested, but on the selected slice of the input
+        start = list(rroi.start)
+        stop = list(rroi.stop)
+        start[self._indexAxis] = sliceIndex
+        stop[self._indexAxis] = sliceIndex + 1
 
-        newKey = roi.roiToSlice(numpy.array(start), numpy.array(stop))
-
-        self.Input[newKey].writeInto(result).wait()
+        self.Input(start, stop).writeInto(result).wait()
         return result
 
     def propagateDirty(self, inputSlot, subindex, roi):
@@ -152,22 +220,28 @@ class OpMultiArraySlicer2(Operator):
                 slot.setDirty(slice(None))
         elif inputSlot == self.Input:
             # Mark each of the intersected slices as dirty
-            sliced_axis = self.Input.meta.axistags.index(self.AxisFlag.value)
-            dirty_slice_indexes = list(zip(roi.start, roi.stop))[sliced_axis]
-
-            all_output_slices_indexes = self.getSliceIndexes()
-            for i in range(*dirty_slice_indexes):
-                if i in all_output_slices_indexes:
-                    if i < len(self.Slices):
-                        slot = self.Slices[i]
-                        sliceRoi = copy.copy(roi)
-                        sliceRoi.start[sliced_axis] = 0
-                        sliceRoi.stop[sliced_axis] = 1
-                        slot.setDirty(sliceRoi)
+            sliced_axis = self._indexAxis
+            dirty_start = roi.start[sliced_axis]
+            dirty_stop = roi.stop[sliced_axis]
+
+            # All affected output slots receive the same roi (sliced axis collapsed to 1)
+            slice_start = TinyVector(roi.start)
+            slice_stop = TinyVector(roi.stop)
+            slice_start[sliced_axis] = 0
+            slice_stop[sliced_axis] = 1
+
+            for output_index, slice_index in enumerate(self._sliceIndexes):
+                if dirty_start <= slice_index < dirty_stop and output_index < len(self.Slices):
+                    self.Slices[output_index].setDirty(slice_start, slice_stop)
         else:
             assert False, "Unknown dirty input slot."
 
 
+# OpMultiArrayStacker bundles the requests of inputs writing less than this many bytes each
+# when there are many more of them than worker threads (0 disables coalescing)
+STACKER_COALESCE_BYTES = int(os.getenv("LAZYFLOW_STACKER_COALESCE_BYTES", 1024 * 1024))
+
+
 class OpMultiArrayStacker(Operator):
     Images = InputSlot(level=1)
     AxisFlag = InputSlot()
@@ -185,32 +259,41 @@ class OpMultiArrayStacker(Operator):
         self.setRightShape()
 
     def setRightShape(self):
-        c = 0
         flag = self.inputs["AxisFlag"].value
-        self.intervals = []
 
         inTagKeys = []
 
+        # For each input: whether it already has the stacking axis (cached for execute)
+        self._inputHasStackAxis = []
+        # For each input: its length along the stacking axis of the output
+        lengths = []
+
+        lastConnectedSlot = None
         for inSlot in self.inputs["Images"]:
-            inTagKeys = [ax.key for ax in inSlot.meta.axistags]
+            inTagKeys = inSlot.meta.getAxisKeys()
+            self._inputHasStackAxis.append(flag in inTagKeys)
+            if flag in inTagKeys:
+                lengths.append(inSlot.meta.shape[inTagKeys.index(flag)])
+            else:
+                lengths.append(1)
+
             if inSlot.upstream_slot is not None:
-                self.Output.meta.assignFrom(inSlot.meta)
+                lastConnectedSlot = inSlot
 
-                outTagKeys = [ax.key for ax in self.outputs["Output"].meta.axistags]
+        # The output meta is taken from the last connected input
+        if lastConnectedSlot is not None:
+            self.Output.meta.assignFrom(lastConnectedSlot.meta)
 
-                if not flag in outTagKeys:
-                    if self.AxisIndex.ready():
-                        axisindex = self.AxisIndex.value
-                    else:
-                        axisindex = len(outTagKeys)
-                    self.outputs["Output"].meta.axistags.insert(axisindex, vigra.defaultAxistags(flag)[0])
+            outTagKeys = self.Output.meta.getAxisKeys()
 
-                old_c = c
-                if flag in inTagKeys:
-                    c += inSlot.meta.shape[inSlot.meta.axistags.index(flag)]
+            if not flag in outTagKeys:
+                if self.AxisIndex.ready():
+                    axisindex = self.AxisIndex.value
                 else:
-                    c += 1
-                self.intervals.append((old_c, c))
+                    axisindex = len(outTagKeys)
+                self.outputs["Output"].meta.axistags.insert(axisindex, vigra.defaultAxistags(flag)[0])
+
+        c = sum(lengths)
 
         if len(self.inputs["Images"]) > 0:
             newshape = list(self.inputs["Images"][0].meta.shape)
@@ -232,70 +315,79 @@ class OpMultiArrayStacker(Operator):
                     self.Output.meta.max_blockshape = max_blockshape
 
             self.outputs["Output"].meta.shape = tuple(newshape)
+            self._stackAxisIndex = self.Output.meta.axistags.index(flag)
+
+            # Interval of each input along the stacking axis of the output
+            self._intervalStops = numpy.cumsum(lengths)
+            self._intervalStarts = self._intervalStops - lengths
         else:
             self.outputs["Output"].meta.shape = None
 
     def execute(self, slot, subindex, rroi, result):
         key = roiToSlice(rroi.start, rroi.stop)
 
-        cnt = 0
-        written = 0
         start, stop = roi.sliceToRoi(key, self.outputs["Output"].meta.shape)
         assert (stop <= self.outputs["Output"].meta.shape).all()
-        # axisindex = self.inputs["AxisIndex"].value
-        flag = self.inputs["AxisFlag"].value
-        axisindex = self.outputs["Output"].meta.axistags.index(flag)
+        axisindex = self._stackAxisIndex
+        stackStart = start[axisindex]
+        stackStop = stop[axisindex]
         # ugly-ugly-ugly
         oldkey = list(key)
         oldkey.pop(axisindex)
 
-        # print "STACKER: ", flag, axisindex
-        # print "requesting an outslot from stacker:", key, result.shape
-        # print "input slots total: ", len(self.inputs['Images'])
-        requests = []
+        # Only the inputs whose interval along the stacking axis intersects the request contribute
+        first = numpy.searchsorted(self._intervalStops, stackStart, side="right")
+        last = numpy.searchsorted(self._intervalStarts, stackStop, side="left")
 
         pool = RequestPool()
-
-        for i, inSlot in enumerate(self.inputs["Images"]):
-            req = None
-            inTagKeys = [ax.key for ax in inSlot.meta.axistags]
-            if flag in inTagKeys:
-                slices = inSlot.meta.shape[axisindex]
-                if (
-                    cnt + slices >= start[axisindex]
-                    and start[axisindex] - cnt < slices
-                    and start[axisindex] + written < stop[axisindex]
-                ):
-                    begin = 0
-                    if cnt < start[axisindex]:
-                        begin = start[axisindex] - cnt
-                    end = slices
-                    if cnt + end > stop[axisindex]:
-                        end -= cnt + end - stop[axisindex]
-                    key_ = copy.copy(oldkey)
-                    key_.insert(axisindex, slice(begin, end, None))
-                    reskey = [slice(None, None, None) for x in range(len(result.shape))]
-                    reskey[axisindex] = slice(written, written + end - begin, None)
-
-                    req = inSlot[tuple(key_)].writeInto(result[tuple(reskey)])
-                    written += end - begin
-                cnt += slices
+        # (input slot, key, destination) of the inputs that have to be requested
+        reads = []
+
+        for i in range(first, last):
+            inSlot = self.inputs["Images"][i]
+            intervalStart = int(self._intervalStarts[i])
+            # position of this input's data within result along the stacking axis
+            written = max(intervalStart - stackStart, 0)
+            if self._inputHasStackAxis[i]:
+                begin = max(stackStart - intervalStart, 0)
+                end = min(int(self._intervalStops[i]), stackStop) - intervalStart
+                key_ = copy.copy(oldkey)
+                key_.insert(axisindex, slice(begin, end, None))
+                key_ = tuple(key_)
+                reskey = [slice(None, None, None) for x in range(len(result.shape))]
+                reskey[axisindex] = slice(written, written + end - begin, None)
+            else:
+                key_ = tuple(oldkey)
+                reskey = [slice(None, None, None) for s in oldkey]
+                reskey.insert(axisindex, written)
+            destArea = result[tuple(reskey)]
+
+            array = _in_memory_array(inSlot)
+            if array is not None:
+                # Data is at hand already, copying it is cheaper than dispatching a request
+                numpy.copyto(destArea, array[key_], casting="unsafe")
             else:
-                if cnt >= start[axisindex] and start[axisindex] + written < stop[axisindex]:
-                    # print "key: ", key, "reskey: ", reskey, "oldkey: ", oldkey
-                    # print "result: ", result.shape, "inslot:", inSlot.meta.shape
-                    reskey = [slice(None, None, None) for s in oldkey]
-                    reskey.insert(axisindex, written)
-                    destArea = result[tuple(reskey)]
-                    req = inSlot[tuple(oldkey)].writeInto(destArea)
-                    written += 1
-                cnt += 1
-
-            if req is not None:
-                pool.add(req)
+                reads.append((inSlot, key_, destArea))
+
+        n_threads = max(Request.global_thread_pool.num_workers, 1)
+        if len(reads) > 2 * n_threads and all(dest.nbytes < STACKER_COALESCE_BYTES for _, _, dest in reads):
+            # Many tiny inputs: one request per worker thread, each reading a run of adjacent inputs
+            bundle_size = -(-len(reads) // n_threads)
+            for bundle_start in range(0, len(reads), bundle_size):
+                bundle = reads[bundle_start : bundle_start + bundle_size]
+                pool.add(Request(partial(self._readInputs, bundle)))
+        else:
+            for inSlot, key_, destArea in reads:
+                pool.add(inSlot[key_].writeInto(destArea))
 
-        pool.wait()
-        pool.clean()
+        if len(pool) > 0:
+            pool.wait()
+            pool.clean()
+
+    @staticmethod
+    def _readInputs(reads):
+        for inSlot, key, destArea in reads:
+            inSlot[key].writeInto(destArea).wait()
 
     def propagateDirty(self, inputSlot, subindex, roi):
         roi = copy.copy(roi)
@@ -322,6 +414,8 @@ class OpSingleChannelSelector(Operator):
 
     def setupOutputs(self):
         channelAxis = self.Input.meta.axistags.channelIndex
+        # Cached for execute and propagateDirty
+        self._channelAxis = channelAxis
         inshape = list(self.Input.meta.shape)
         outshape = list(inshape)
         outshape.pop(channelAxis)
@@ -355,7 +449,7 @@ class OpSingleChannelSelector(Operator):
 
     def execute(self, slot, subindex, roi, result):
         index = self.inputs["Index"].value
-        channelIndex = self.Input.meta.axistags.channelIndex
+        channelIndex = self._channelAxis
         assert (
             self.inputs["Input"].meta.shape[channelIndex] > index
         ), "Requested channel, {}, is out of Range (input shape is {})".format(index, self.Input.meta.shape)
@@ -371,7 +465,7 @@ class OpSingleChannelSelector(Operator):
     def propagateDirty(self, slot, subindex, roi):
         key = roi.toSlice()
         if slot == self.Input:
-            channelIndex = self.Input.meta.axistags.channelIndex
+            channelIndex = self._channelAxis
             newKey = list(key)
             newKey[channelIndex] = slice(0, 1, None)
             # key = key[:-1] + (slice(0,1,None),)
@@ -401,6 +495,7 @@ class OpSubRegion(Operator):
         self._roi = self.Roi.value
         assert isinstance(self._roi[0], tuple)
         assert isinstance(self._roi[1], tuple)
+        self._roi_start_tuple = tuple(self._roi[0])
         start, stop = list(map(TinyVector, self._roi))
         if not (len(start) == len(stop) == len(self.Input.meta.shape)):
             # Roi dimensionality must match shape dimensionality
@@ -413,10 +508,11 @@ class OpSubRegion(Operator):
             self.Output.meta.shape = tuple(stop - start)
 
     def execute(self, slot, subindex, output_roi, result):
-        input_roi = numpy.array((output_roi.start, output_roi.stop))
-        input_roi += self._roi[0]
-        input_roi = list(map(tuple, input_roi))
-        self.Input(*input_roi).writeInto(result).wait()
+        # Plain tuple arithmetic: for a handful of axes this is much cheaper than a numpy roundtrip
+        offset = self._roi_start_tuple
+        start = tuple(a + b for a, b in zip(output_roi.start, offset))
+        stop = tuple(a + b for a, b in zip(output_roi.stop, offset))
+        self.Input(start, stop).writeInto(result).wait()
         return result
 
     def propagateDirty(self, dirtySlot, subindex, input_dirty_roi):
@@ -425,12 +521,12 @@ class OpSubRegion(Operator):
             # The dimensionality of the data is changing.
             # The whole workflow must be updating, so don't bother with dirty notifications.
             return
-        intersection = getIntersection(input_dirty_roi, self._roi, False)
-        if intersection:
-            output_dirty_roi = numpy.array(intersection)
-            output_dirty_roi -= self._roi[0]
-            output_dirty_roi = list(map(tuple, output_dirty_roi))
-            self.Output.setDirty(*output_dirty_roi)
+        # Intersect with our roi and shift into output coordinates with plain tuple arithmetic
+        offset = self._roi_start_tuple
+        output_dirty_start = tuple(max(a, b) - o for a, b, o in zip(input_dirty_roi[0], self._roi[0], offset))
+        output_dirty_stop = tuple(min(a, b) - o for a, b, o in zip(input_dirty_roi[1], self._roi[1], offset))
+        if all(start < stop for start, stop in zip(output_dirty_start, output_dirty_stop)):
+            self.Output.setDirty(output_dirty_start, output_dirty_stop)
 
 
 class OpMultiArrayMerger(Operator):
@@ -469,13 +565,17 @@ class OpMultiArrayMerger(Operator):
 
     def execute(self, slot, subindex, roi, result):
         key = roiToSlice(roi.start, roi.stop)
+        # Fetch all inputs in parallel
+        pool = RequestPool()
         requests = []
         for input in self.inputs["Inputs"]:
-            requests.append(input[key])
+            req = input[key]
+            requests.append(req)
+            pool.add(req)
+        pool.wait()
 
-        data = []
-        for req in requests:
-            data.append(req.wait())
+        # All requests are finished, so wait() just returns their results
+        data = [req.wait() for req in requests]
 
         fun = self.inputs["MergingFunction"].value
 
@@ -498,16 +598,37 @@ class OpMaxChannelIndicatorOperator(Operator):
     to the other channels.
 
     Note: it is expected that Output Rois are always single channel.
+          Since clients usually request all channels of a tile one after another
+          (or in parallel), the per-pixel index of the max channel is kept for the
+          most recently requested tiles, so the input is only fetched once per tile.
     """
 
     Input = InputSlot()
     Output = OutputSlot()
 
+    # Number of tiles for which the index of the max channel is kept
+    MAX_CACHED_TILES = 16
+    # Total size of the kept indexes, larger rois are not cached at all
+    MAX_CACHED_BYTES = 16 * 1024 * 1024
+
+    def __init__(self, *args, **kwargs):
+        super(OpMaxChannelIndicatorOperator, self).__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        # cache_key -> (request computing the index, size of the index in bytes)
+        self._max_channel_indexes = collections.OrderedDict()
+        self._cached_bytes = 0
+
     def setupOutputs(self):
         assert self.Input.meta.getAxisKeys()[-1] == "c", "This operator assumes that the last axis is the channel axis."
         self.Output.meta.assignFrom(self.Input.meta)
         self.Output.meta.dtype = numpy.uint8
         self.Output.meta.drange = (0, 1)
+        # An input advertising a (0, 0) data range is all zeros, no need to fetch it at all
+        drange = self.Input.meta.drange
+        self._input_is_zero = drange is not None and tuple(drange) == (0, 0)
+        n_channels = self.Input.meta.shape[-1]
+        self._index_itemsize = numpy.min_scalar_type(max(n_channels - 1, 0)).itemsize
+        self._clear_cache()
 
     def execute(self, slot, subindex, roi, result):
         *key, c = roi.toSlice()
@@ -516,18 +637,68 @@ class OpMaxChannelIndicatorOperator(Operator):
         if n_channels_requested != 1:
             raise InvalidRoiException(f"This operator only accepts slices of size 1 for c! Got {n_channels_requested}.")
 
-        data = self.Input[(*key, slice(None))].wait()
+        if self._input_is_zero:
+            result[:] = 0
+            return
+
+        max_channel_index = self._get_max_channel_index(key)
 
         # special case, when data is all zeros (e.g. directly from frozen cache w/o trained classifier)
-        if not numpy.any(data):
+        if max_channel_index is None:
             result[:] = 0
             return
 
-        result[:] = numpy.uint8(numpy.argmax(data, axis=-1) == c.start)[..., numpy.newaxis]
+        result[..., 0] = max_channel_index == c.start
+
+    def _compute_max_channel_index(self, key):
+        data = self.Input[(*key, slice(None))].wait()
+        return _max_channel_index(data) if numpy.any(data) else None
+
+    def _get_max_channel_index(self, key):
+        """
+        Return the per-pixel index of the max channel for the given spatial key,
+        or None if the input is all zeros there.
+
+        Concurrent callers for the same key share a single request computing it.
+        """
+        nbytes = self._index_itemsize * int(numpy.prod([s.stop - s.start for s in key]))
+        if nbytes > self.MAX_CACHED_BYTES:
+            return self._compute_max_channel_index(key)
+
+        cache_key = tuple((s.start, s.stop) for s in key)
+        with self._lock:
+            if cache_key in self._max_channel_indexes:
+                self._max_channel_indexes.move_to_end(cache_key)
+                req = self._max_channel_indexes[cache_key][0]
+            else:
+                req = Request(partial(self._compute_max_channel_index, key))
+                self._max_channel_indexes[cache_key] = (req, nbytes)
+                self._cached_bytes += nbytes
+                while (
+                    len(self._max_channel_indexes) > self.MAX_CACHED_TILES
+                    or self._cached_bytes > self.MAX_CACHED_BYTES
+                ):
+                    self._cached_bytes -= self._max_channel_indexes.popitem(last=False)[1][1]
+
+        try:
+            return req.wait()
+        except BaseException:
+            # Don't keep failed (or cancelled) computations around
+            with self._lock:
+                if self._max_channel_indexes.get(cache_key, (None,))[0] is req:
+                    self._cached_bytes -= self._max_channel_indexes.pop(cache_key)[1]
+            raise
+
+    def _clear_cache(self):
+        # Requests still running for data that became dirty are dropped, only their current waiters get the result
+        with self._lock:
+            self._max_channel_indexes.clear()
+            self._cached_bytes = 0
 
     def propagateDirty(self, slot, subindex, roi):
         key = roi.toSlice()
         if slot == self.Input:
+            self._clear_cache()
             self.outputs["Output"].setDirty(key)
 
 
@@ -546,6 +717,8 @@ class OpPixelOperator(Operator):
 
     def setupOutputs(self):
         self.function = self.inputs["Function"].value
+        # Unary ufuncs (e.g. numpy.sqrt) can write their result directly into the output buffer
+        self._function_supports_out = isinstance(self.function, numpy.ufunc) and self.function.nin == 1
 
         self.Output.meta.assignFrom(self.Input.meta)
 
@@ -569,7 +742,13 @@ class OpPixelOperator(Operator):
         if self.Input.meta.dtype == self.Output.meta.dtype:
             req.writeInto(result)
         matrix = req.wait()
-        result[:] = self.function(matrix)
+        if self._function_supports_out:
+            self.function(matrix, out=result)
+        else:
+            output = self.function(matrix)
+            # Functions working in place may return the result buffer itself, no need to copy it onto itself
+            if output is not result:
+                result[:] = output
         return result
 
     def propagateDirty(self, slot, subindex, roi):
@@ -601,23 +780,35 @@ class OpMultiInputConcatenater(Operator):
         super(OpMultiInputConcatenater, self).__init__(*args, **kwargs)
         self._numInputLists = 0
 
+        # Position of each input multislot (by id) within self.Inputs,
+        # and the output index of the first subslot of each input multislot.
+        self._inputListPositions = {}
+        self._inputListOffsets = []
+
+    def _rebuildOffsets(self):
+        self._inputListPositions = {}
+        self._inputListOffsets = []
+        offset = 0
+        for position, multislot in enumerate(self.Inputs):
+            self._inputListPositions[id(multislot)] = position
+            self._inputListOffsets.append(offset)
+            offset += len(multislot)
+
+    def _shiftOffsets(self, resizedSlot, delta):
+        """
+        Update the offsets of all input multislots after the resized one.
+        """
+        position = self._inputListPositions[id(resizedSlot)]
+        for i in range(position + 1, len(self._inputListOffsets)):
+            self._inputListOffsets[i] += delta
+
     def getOutputIndex(self, inputMultiSlot, inputIndex):
         """
         Determine which output index corresponds to the given input multislot and index.
         """
-        # Determine the corresponding output index
-        outputIndex = 0
-        # Search for the input slot
-        for index, multislot in enumerate(self.Inputs):
-            if inputMultiSlot != multislot:
-                # Not the resized slot.  Skip all its subslots
-                outputIndex += len(multislot)
-            else:
-                # Found the resized slot.  Add the offset and stop here.
-                outputIndex += inputIndex
-                return outputIndex
-
-        assert False
+        assert id(inputMultiSlot) in self._inputListPositions
+        position = self._inputListPositions[id(inputMultiSlot)]
+        return self._inputListOffsets[position] + inputIndex
 
     def handleInputInserted(self, resizedSlot, inputPosition, totalsize):
         """
@@ -626,6 +817,7 @@ class OpMultiInputConcatenater(Operator):
         """
         # Determine which output slot this corresponds to
         outputIndex = self.getOutputIndex(resizedSlot, inputPosition)
+        self._shiftOffsets(resizedSlot, 1)
 
         # Insert new output slot and connect it up.
         newOutputLength = len(self.Output) + 1
@@ -639,6 +831,7 @@ class OpMultiInputConcatenater(Operator):
         """
         # Determine which output slot this corresponds to
         outputIndex = self.getOutputIndex(resizedSlot, inputPosition)
+        self._shiftOffsets(resizedSlot, -1)
 
         # Remove the corresponding output slot
         newOutputLength = len(self.Output) - 1
@@ -652,6 +845,9 @@ class OpMultiInputConcatenater(Operator):
 
         self._numInputLists = len(self.Inputs)
 
+        # From now on, the offsets are kept up-to-date by handleInputInserted/handleInputRemoved
+        self._rebuildOffsets()
+
         # First pass to determine output length
         totalOutputLength = 0
         for index, slot in enumerate(self.Inputs):
@@ -741,6 +937,10 @@ class OpDtypeView(Operator):
         self.Output.setDirty(roi)
 
 
+# Block size (bytes of output) used by OpConvertDtype to keep conversions cache-resident
+CONVERT_BLOCK_BYTES = int(os.getenv("LAZYFLOW_CONVERT_BLOCK_BYTES", 128 * 1024))
+
+
 class OpConvertDtype(Operator):
     Input = InputSlot()
     ConversionDtype = InputSlot()
@@ -753,9 +953,42 @@ class OpConvertDtype(Operator):
     def execute(self, slot, subindex, roi, result):
         if self.Input.meta.dtype == self.ConversionDtype.value:
             self.Input(roi.start, roi.stop).writeInto(result).wait()
+        elif self._can_convert_in_place(result):
+            self._convert_in_place(roi, result)
         else:
             input_data = self.Input(roi.start, roi.stop).wait()
-            result[:] = input_data.astype(self.ConversionDtype.value)
+            # Convert directly into result instead of creating a converted temporary via astype()
+            numpy.copyto(result, input_data, casting="unsafe")
+
+    def _can_convert_in_place(self, result):
+        input_dtype = numpy.dtype(self.Input.meta.dtype)
+        return (
+            result.flags.c_contiguous
+            and result.dtype.itemsize >= input_dtype.itemsize
+            and not result.dtype.hasobject
+            and not input_dtype.hasobject
+        )
+
+    def _convert_in_place(self, roi, result):
+        """
+        Fetch the input into the tail of the result buffer and convert it front to back,
+        one cache-sized block at a time.
+
+        Since output items are at least as large as input items, converting a block never
+        overwrites input data of later blocks. This avoids allocating a tile-sized buffer for
+        the input, and numpy only needs a block-sized temporary for the overlapping copy.
+        """
+        input_dtype = numpy.dtype(self.Input.meta.dtype)
+        result_flat = result.view(numpy.ndarray).reshape(-1)
+        offset = result_flat.nbytes - result_flat.size * input_dtype.itemsize
+        input_flat = result_flat.view(numpy.uint8)[offset:].view(input_dtype)
+
+        self.Input(roi.start, roi.stop).writeInto(input_flat.reshape(result.shape)).wait()
+
+        step = max(1, CONVERT_BLOCK_BYTES // result_flat.itemsize)
+        for start in range(0, result_flat.size, step):
+            stop = start + step
+            numpy.copyto(result_flat[start:stop], input_flat[start:stop], casting="unsafe")
 
     def propagateDirty(self, slot, subindex, roi):
         if slot is self.ConversionDtype:
@@ -806,64 +1039,109 @@ class OpMultiChannelSelector(Operator):
     Output = OutputSlot()
 
     def setupOutputs(self):
-        if self.Input.meta.getAxisKeys()[-1] != "c":
+        # channelIndex is looked up in the axistags directly, no list of axis keys is built
+        axistags = self.Input.meta.axistags
+        if axistags.channelIndex != len(axistags) - 1:
             raise ValueError("Channel axis must be last for the input")
 
-        channel_axis = -1
-
         max_channel = self.Input.meta.getTaggedShape()["c"]
         selected_channels: Tuple[int] = self.SelectedChannels.value
-        if len(selected_channels) == 0 or any(x >= max_channel for x in selected_channels):
+        selected = numpy.asarray(selected_channels, dtype=numpy.int64)
+        if selected.size == 0 or (selected < 0).any() or (selected >= max_channel).any():
             self.Output.meta.NOTREADY = True
             return
 
         self.Output.meta.assignFrom(self.Input.meta)
 
         in_shape = self.Input.meta.shape
-        self.Output.meta.shape = (*in_shape[:-1], len(selected_channels))
+        # Cached for execute, the channel axis is always the last one
+        self._caxis = channel_axis = len(in_shape) - 1
+        self.Output.meta.shape = (*in_shape[:channel_axis], len(selected_channels))
 
         ideal = self.Output.meta.ideal_blockshape
         if ideal is not None:
             assert len(ideal) == len(in_shape)
-            ideal = numpy.asarray(ideal, dtype=numpy.int64)
-            ideal[channel_axis] = 1
-            self.Output.meta.ideal_blockshape = tuple(ideal)
+            self.Output.meta.ideal_blockshape = (*ideal[:channel_axis], 1)
 
         max_blockshape = self.Output.meta.max_blockshape
         if max_blockshape is not None:
             assert len(max_blockshape) == len(in_shape)
-            max_blockshape = numpy.asarray(max_blockshape, dtype=numpy.int64)
-            max_blockshape[channel_axis] = len(selected_channels)
-            self.Output.meta.max_blockshape = tuple(max_blockshape)
+            self.Output.meta.max_blockshape = (*max_blockshape[:channel_axis], len(selected_channels))
+
+        # Cached for execute: the selection, and the runs to fetch per requested range of output channels
+        self._selected_channels = tuple(selected.tolist())
+        self._channel_runs = {(0, len(selected_channels)): _channel_runs(self._selected_channels)}
+        self._is_passthrough = self._selected_channels == tuple(range(max_channel))
 
     def execute(self, slot, subindex, roi, result):
-        channel_indexes: Tuple[int] = self.SelectedChannels.value
+        if self._is_passthrough:
+            # All input channels in their original order: output and input rois are the same
+            self.Input(roi.start, roi.stop).writeInto(result).wait()
+            return
+
+        # only the output channels covered by the roi are requested
+        caxis = self._caxis
+        out_channels = (int(roi.start[caxis]), int(roi.stop[caxis]))
+
+        array = _in_memory_array(self.Input)
+        if array is not None:
+            # Data is at hand already: gather all selected channels in a single pass, without requests
+            channels = self._selected_channels[slice(*out_channels)]
+            spatial_data = array[roi.toSlice()[:caxis]].view(numpy.ndarray)
+            if result.dtype == spatial_data.dtype:
+                numpy.take(spatial_data, channels, axis=caxis, out=result, mode="clip")
+            else:
+                # take only writes to out if it can cast back safely, convert like the request path does
+                result[...] = numpy.take(spatial_data, channels, axis=caxis, mode="clip")
+            return
+
+        runs_and_repeats = self._channel_runs.get(out_channels)
+        if runs_and_repeats is None:
+            runs_and_repeats = _channel_runs(self._selected_channels[slice(*out_channels)])
+            self._channel_runs[out_channels] = runs_and_repeats
+        runs, repeats = runs_and_repeats
 
         # make sure to request the minimum (consecutive) channels
-        input_roi = roi.copy()
+        start, stop = list(roi.start), list(roi.stop)
 
-        if len(channel_indexes) == 1:
-            # Fetch in-place
-            channel_index = channel_indexes[0]
-            input_roi.start[-1] = channel_index
-            input_roi.stop[-1] = channel_index + 1
-            self.Input(input_roi.start, input_roi.stop).writeInto(result).wait()
+        if len(runs) == 1 and not repeats and isinstance(runs[0][2], slice):
+            # Single channel or consecutive ascending channels: fetch in-place with a single request
+            start[caxis], stop[caxis] = runs[0][:2]
+            self.Input(start, stop).writeInto(result).wait()
 
         else:
-            pool = RequestPool()
-
-            # get data from the respective channels in the input individually (channel_indexes)
-            # and write them to the expected channel in result
-            for i, channel in enumerate(channel_indexes):
-                # add 1 to channel indices stop for valid single channel slices
-                input_roi.start[-1] = channel
-                input_roi.stop[-1] = channel + 1
-                dest_key = tuple([slice(None) for _ in input_roi.start[:-1]]) + (slice(i, i + 1),)
-                req = self.Input(input_roi.start, input_roi.stop).writeInto(result[dest_key])
-                pool.add(req)
+            requests = []
+            scattered = []
+
+            # get each run of consecutive channels from the input with a single request
+            for in_start, in_stop, out_index in runs:
+                start[caxis] = in_start
+                stop[caxis] = in_stop
+                req = self.Input(start, stop)
+                if isinstance(out_index, slice):
+                    req.writeInto(result[..., out_index])
+                else:
+                    # run is spread over the output, fetch it separately and distribute afterwards
+                    scattered.append((req, out_index))
+                requests.append(req)
 
-            pool.wait()
-            pool.clean()
+            if len(requests) == 1:
+                # e.g. reversed or repeated channels: nothing to run in parallel
+                requests[0].wait()
+            else:
+                with RequestPool() as pool:
+                    for req in requests:
+                        pool.add(req)
+
+            for req, out_index in scattered:
+                result[..., out_index] = req.wait()
+
+            # channels selected more than once are copied (broadcast) from their first occurrence
+            for out_index, first_out_channel in repeats:
+                if isinstance(out_index, slice):
+                    numpy.copyto(result[..., out_index], result[..., first_out_channel, None], casting="no")
+                else:
+                    result[..., out_index] = result[..., first_out_channel, None]
 
     def propagateDirty(self, slot, subindex, roi):
         self.propagateDirtyIfNewModTime()
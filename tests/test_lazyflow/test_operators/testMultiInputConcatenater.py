@@ -85,3 +85,29 @@ class TestMultiInputConcatenater(object):
 
         assert numpy.all(op.Output[1][...].wait() == array3[...])
         assert numpy.all(op.Output[4][...].wait() == array6[...])
+
+    def testInsertRemove(self):
+        g = Graph()
+        op = OpMultiInputConcatenater(graph=g)
+        op.Inputs.resize(3)
+        for i, multislot in enumerate(op.Inputs):
+            multislot.resize(2)
+            for j, slot in enumerate(multislot):
+                slot.setValue(numpy.array([10 * i + j]))
+
+        def output_values():
+            return [slot[:].wait()[0] for slot in op.Output]
+
+        assert output_values() == [0, 1, 10, 11, 20, 21]
+
+        # Insert into a list in the middle: all subsequent outputs are shifted
+        op.Inputs[1].insertSlot(1, 3)
+        op.Inputs[1][1].setValue(numpy.array([15]))
+        assert output_values() == [0, 1, 10, 15, 11, 20, 21]
+
+        op.Inputs[0].removeSlot(0, 1)
+        assert output_values() == [1, 10, 15, 11, 20, 21]
+
+        op.Inputs[2].insertSlot(2, 3)
+        op.Inputs[2][2].setValue(numpy.array([22]))
+        assert output_values() == [1, 10, 15, 11, 20, 21, 22]
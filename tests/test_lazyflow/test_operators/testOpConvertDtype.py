@@ -0,0 +1,37 @@
+import numpy
+import pytest
+import vigra
+
+from lazyflow.operators import OpArrayPiper, OpConvertDtype, generic
+
+
+@pytest.mark.parametrize(
+    "in_dtype,out_dtype",
+    [
+        (numpy.uint8, numpy.uint8),
+        (numpy.uint16, numpy.float32),
+        (numpy.float64, numpy.float32),
+        (numpy.float32, numpy.uint8),
+        (numpy.int32, numpy.float32),
+        (numpy.uint8, numpy.int64),
+    ],
+)
+@pytest.mark.parametrize("block_bytes", [16, 128 * 1024])
+def test_convert_dtype(graph, monkeypatch, in_dtype, out_dtype, block_bytes):
+    monkeypatch.setattr(generic, "CONVERT_BLOCK_BYTES", block_bytes)
+
+    data = numpy.random.randint(0, 256, (10, 20, 3)).astype(in_dtype)
+    vdata = vigra.taggedView(data, "yxc")
+
+    op_piper = OpArrayPiper(graph=graph)
+    op_piper.Input.setValue(vdata)
+
+    op = OpConvertDtype(graph=graph)
+    op.Input.connect(op_piper.Output)
+    op.ConversionDtype.setValue(out_dtype)
+
+    assert op.Output.meta.dtype == out_dtype
+
+    output = op.Output[2:7, 5:15, 1:3].wait()
+    assert output.dtype == out_dtype
+    numpy.testing.assert_array_equal(output, data[2:7, 5:15, 1:3].astype(out_dtype))
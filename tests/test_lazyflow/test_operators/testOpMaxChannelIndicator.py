@@ -4,9 +4,10 @@ import vigra
 from lazyflow.utility import is_root_cause
 
 from lazyflow.operators import OpArrayPiper, OpMaxChannelIndicatorOperator
-from lazyflow.request.request import RequestError
+from lazyflow.request.request import RequestError, RequestPool
 from lazyflow.roi import InvalidRoiException
 from lazyflow.utility import Pipeline
+from lazyflow.utility.testing import OpArrayPiperWithAccessCount
 
 
 def test_OpMaxChannelIndicatorOperator_all_zeros(graph):
@@ -69,3 +70,98 @@ def test_OpMaxChannelIndicatorOperator_unexpected_roi_raises(graph):
             pipe_line[-1].Output[()].wait()
 
     assert is_root_cause(InvalidRoiException, exc_info.value)
+
+
+@pytest.mark.parametrize("with_nan", [False, True])
+@pytest.mark.parametrize("n_channels", [1, 2, 3, 4])
+def test_OpMaxChannelIndicatorOperator_matches_argmax(graph, n_channels, with_nan):
+    # small integer range to provoke many ties between channels
+    data = numpy.random.randint(0, 3, (1, 3, 5, 7, n_channels)).astype(numpy.float32)
+    if with_nan:
+        data[numpy.random.random(data.shape) < 0.2] = numpy.nan
+        data[0, 0, 0, 0, :] = numpy.nan
+        data[0, 0, 0, 1, -1] = numpy.nan
+    data = vigra.VigraArray(data, axistags=vigra.defaultAxistags("tzyxc"))
+
+    expected = numpy.argmax(data, axis=-1)
+
+    with Pipeline(graph=graph) as pipe_line:
+        pipe_line.add(OpArrayPiper, Input=data)
+        pipe_line.add(OpMaxChannelIndicatorOperator)
+
+        for c in range(n_channels):
+            numpy.testing.assert_array_equal(pipe_line[-1].Output[..., c].wait(), (expected == c)[..., None])
+
+
+def test_OpMaxChannelIndicatorOperator_fetches_input_once_per_tile(graph):
+    data = vigra.VigraArray(numpy.random.random((1, 3, 5, 7, 3)), axistags=vigra.defaultAxistags("tzyxc"))
+    expected = numpy.argmax(data, axis=-1)
+
+    with Pipeline(graph=graph) as pipe_line:
+        pipe_line.add(OpArrayPiperWithAccessCount, Input=data)
+        pipe_line.add(OpMaxChannelIndicatorOperator)
+
+        for c in range(data.channels):
+            numpy.testing.assert_array_equal(pipe_line[-1].Output[..., c].wait(), (expected == c)[..., None])
+        assert pipe_line[0].accessCount == 1
+
+        # dirty input invalidates the kept tiles
+        data[...] = data[..., ::-1]
+        pipe_line[0].Input.setDirty(slice(None))
+        for c in range(data.channels):
+            numpy.testing.assert_array_equal(pipe_line[-1].Output[..., c].wait(), (expected == 2 - c)[..., None])
+        assert pipe_line[0].accessCount == 2
+
+
+
+def test_OpMaxChannelIndicatorOperator_parallel_channel_requests_fetch_input_once(graph):
+    data = vigra.VigraArray(numpy.random.random((1, 3, 5, 7, 6)), axistags=vigra.defaultAxistags("tzyxc"))
+    expected = numpy.argmax(data, axis=-1)
+
+    with Pipeline(graph=graph) as pipe_line:
+        pipe_line.add(OpArrayPiperWithAccessCount, Input=data)
+        pipe_line.add(OpMaxChannelIndicatorOperator)
+
+        requests = [pipe_line[-1].Output[..., c] for c in range(data.channels)]
+        with RequestPool() as pool:
+            for req in requests:
+                pool.add(req)
+
+        for c, req in enumerate(requests):
+            numpy.testing.assert_array_equal(req.wait(), (expected == c)[..., None])
+        assert pipe_line[0].accessCount == 1
+
+
+def test_OpMaxChannelIndicatorOperator_large_rois_not_cached(graph, monkeypatch):
+    # index of this roi takes 1 * 3 * 5 * 7 bytes
+    monkeypatch.setattr(OpMaxChannelIndicatorOperator, "MAX_CACHED_BYTES", 100)
+    data = vigra.VigraArray(numpy.random.random((1, 3, 5, 7, 3)), axistags=vigra.defaultAxistags("tzyxc"))
+    expected = numpy.argmax(data, axis=-1)
+
+    with Pipeline(graph=graph) as pipe_line:
+        pipe_line.add(OpArrayPiperWithAccessCount, Input=data)
+        pipe_line.add(OpMaxChannelIndicatorOperator)
+
+        for c in range(data.channels):
+            numpy.testing.assert_array_equal(pipe_line[-1].Output[..., c].wait(), (expected == c)[..., None])
+        assert pipe_line[0].accessCount == data.channels
+
+        # smaller tiles are kept
+        pipe_line[0].clear()
+        for c in range(data.channels):
+            numpy.testing.assert_array_equal(
+                pipe_line[-1].Output[:, :2, :, :, c].wait(), (expected[:, :2] == c)[..., None]
+            )
+        assert pipe_line[0].accessCount == 1
+
+def test_OpMaxChannelIndicatorOperator_zero_drange_skips_fetch(graph):
+    data = vigra.VigraArray(numpy.zeros((1, 3, 5, 7, 3)), axistags=vigra.defaultAxistags("tzyxc"))
+
+    op_piper = OpArrayPiperWithAccessCount(graph=graph)
+    op_piper.Input.setValue(data, extra_meta={"drange": (0, 0)})
+    op = OpMaxChannelIndicatorOperator(graph=graph)
+    op.Input.connect(op_piper.Output)
+
+    for c in range(data.channels):
+        numpy.testing.assert_array_equal(op.Output[..., c].wait(), numpy.zeros((1, 3, 5, 7, 1)))
+    assert op_piper.accessCount == 0
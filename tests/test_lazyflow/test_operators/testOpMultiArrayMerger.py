@@ -0,0 +1,19 @@
+import numpy
+import vigra
+
+from lazyflow.operators import OpArrayPiper, OpMultiArrayMerger
+
+
+def test_merge_sum(graph):
+    arrays = [numpy.random.randint(0, 100, (10, 20, 1)).astype(numpy.uint32) for _ in range(5)]
+
+    op = OpMultiArrayMerger(graph=graph)
+    op.MergingFunction.setValue(sum)
+    op.Inputs.resize(len(arrays))
+    for slot, array in zip(op.Inputs, arrays):
+        op_piper = OpArrayPiper(graph=graph)
+        op_piper.Input.setValue(vigra.taggedView(array, "yxc"))
+        slot.connect(op_piper.Output)
+
+    output = op.Output[2:7, 5:15, :].wait()
+    numpy.testing.assert_array_equal(output, sum(arrays)[2:7, 5:15, :])
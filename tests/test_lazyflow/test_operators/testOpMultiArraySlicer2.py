@@ -116,6 +116,29 @@ class TestOpMultiArraySlicer2(object):
         assert dirtyRois[2].start == [0, 0, 0, 0]
         assert dirtyRois[2].stop == [10, 10, 10, 3]
 
+    def testDirtySelectedSlices(self):
+        opSlicer = self.opSlicer
+        opSlicer.SliceIndexes.setValue([2, 0])
+
+        dirtyRois = {}
+
+        def handleDirty(i, slot, roi):
+            dirtyRois[i] = roi
+
+        for i, slot in enumerate(opSlicer.Slices):
+            slot.notifyDirty(partial(handleDirty, i))
+
+        # Only input channel 2 is dirty, which is provided on Slices[0]
+        dirtyInputRoi = SubRegion(slot=opSlicer.Input, start=[4, 3, 2, 1], stop=[6, 5, 4, 3])
+        opSlicer.Input.setDirty(dirtyInputRoi)
+        assert list(dirtyRois.keys()) == [0]
+        assert dirtyRois[0].start == [4, 3, 2, 0]
+        assert dirtyRois[0].stop == [6, 5, 4, 1]
+
+        # The input roi itself must not be modified
+        assert dirtyInputRoi.start == [4, 3, 2, 1]
+        assert dirtyInputRoi.stop == [6, 5, 4, 3]
+
     def testReshape(self):
         opSlicer = self.opSlicer
 
@@ -29,8 +29,9 @@ from lazyflow import operators
 from lazyflow.operators.generic import OpMultiArrayStacker
 from lazyflow.operators.opArrayPiper import OpArrayPiper
 from lazyflow.utility import is_root_cause
+from lazyflow.utility.testing import OpArrayPiperWithAccessCount
 
-from lazyflow.request.request import RequestError
+from lazyflow.request.request import Request, RequestError
 from lazyflow.roi import roiToSlice, sliceToRoi
 
 from lazyflow.operators.valueProviders import OpOutputProvider
@@ -191,6 +192,124 @@ def testMinimalRequest():
         assert len(op.requested_rois) == 0 or index in range(3, 5), "Stacker requested more data than it needed."
 
 
+def testInMemoryInputs(monkeypatch):
+    """
+    Inputs whose data was assigned via setValue are copied directly, mixed with requested ones.
+    """
+    graph = Graph()
+    arrays = [vigra.taggedView(numpy.random.random((10, 20)).astype(numpy.float32), "yx") for _ in range(3)]
+
+    opValue0 = OpArrayPiper(graph=graph)
+    opValue0.Input.setValue(arrays[0])
+    opRequested = OpArrayPiper(graph=graph)
+    opRequested.Input.setValue(arrays[1])
+    opValue2 = OpArrayPiper(graph=graph)
+    opValue2.Input.setValue(arrays[2])
+
+    opStacker = OpMultiArrayStacker(graph=graph)
+    opStacker.AxisFlag.setValue("z")
+    opStacker.AxisIndex.setValue(0)
+    opStacker.Images.resize(3)
+    opStacker.Images[0].connect(opValue0.Input)
+    opStacker.Images[1].connect(opRequested.Output)
+    opStacker.Images[2].connect(opValue2.Input)
+
+    # record the rois requested from each input
+    requested_rois = [[] for _ in opStacker.Images]
+    for islot, rois in zip(opStacker.Images, requested_rois):
+
+        def recording_get(roi, get=islot.get, rois=rois):
+            rois.append(roi)
+            return get(roi)
+
+        monkeypatch.setattr(islot, "get", recording_get)
+
+    expected = numpy.stack(arrays)
+    assert_array_equal(opStacker.Output[:].wait(), expected)
+    assert_array_equal(opStacker.Output[1:3, 2:7, 5:15].wait(), expected[1:3, 2:7, 5:15])
+
+    # only the input without a value at hand is requested, once per stacker request
+    assert [len(rois) for rois in requested_rois] == [0, 2, 0]
+
+
+
+@pytest.mark.parametrize("axes, shapes", [("yx", [(10, 20)] * 3), ("zyx", [(2, 10, 20), (3, 10, 20), (1, 10, 20)])])
+def testValueInputsCountTowardsShape(axes, shapes):
+    """
+    Inputs assigned directly via setValue (without an upstream slot) are part of the stacked output.
+    """
+    graph = Graph()
+    arrays = [vigra.taggedView(numpy.random.random(shape).astype(numpy.float32), axes) for shape in shapes]
+
+    opStacker = OpMultiArrayStacker(graph=graph)
+    opStacker.AxisFlag.setValue("z")
+    opStacker.AxisIndex.setValue(0)
+    opStacker.Images.resize(3)
+    opPipers = [OpArrayPiper(graph=graph) for _ in range(2)]
+    opPipers[0].Input.setValue(arrays[0])
+    opPipers[1].Input.setValue(arrays[2])
+    opStacker.Images[0].connect(opPipers[0].Output)
+    opStacker.Images[1].setValue(arrays[1])
+    opStacker.Images[2].connect(opPipers[1].Output)
+
+    if axes == "yx":
+        expected = numpy.stack(arrays)
+    else:
+        expected = numpy.concatenate(arrays)
+    assert opStacker.Output.meta.shape == expected.shape
+    assert_array_equal(opStacker.Output[:].wait(), expected)
+    assert_array_equal(opStacker.Output[1:4, 2:7, 5:15].wait(), expected[1:4, 2:7, 5:15])
+
+@pytest.fixture
+def two_worker_threads():
+    num_workers = Request.global_thread_pool.num_workers
+    Request.reset_thread_pool(2)
+    yield
+    Request.reset_thread_pool(num_workers)
+
+
+@pytest.mark.parametrize("coalesce_bytes", [0, 1024 * 1024])
+def testManySmallInputs(monkeypatch, two_worker_threads, coalesce_bytes):
+    from lazyflow.operators import generic
+
+    monkeypatch.setattr(generic, "STACKER_COALESCE_BYTES", coalesce_bytes)
+
+    bundle_sizes = []
+    readInputs = OpMultiArrayStacker._readInputs
+
+    def recordingReadInputs(reads):
+        bundle_sizes.append(len(reads))
+        readInputs(reads)
+
+    monkeypatch.setattr(OpMultiArrayStacker, "_readInputs", staticmethod(recordingReadInputs))
+
+    graph = Graph()
+    arrays = [vigra.taggedView(numpy.random.random((4, 5)).astype(numpy.float32), "yx") for _ in range(50)]
+
+    opStacker = OpMultiArrayStacker(graph=graph)
+    opStacker.AxisFlag.setValue("z")
+    opStacker.AxisIndex.setValue(0)
+    opStacker.Images.resize(len(arrays))
+    opPipers = []
+    for islot, array in zip(opStacker.Images, arrays):
+        opPiper = OpArrayPiperWithAccessCount(graph=graph)
+        opPiper.Input.setValue(array)
+        islot.connect(opPiper.Output)
+        opPipers.append(opPiper)
+
+    expected = numpy.stack(arrays)
+    assert_array_equal(opStacker.Output[:].wait(), expected)
+    assert_array_equal(opStacker.Output[7:41, 1:3, :].wait(), expected[7:41, 1:3, :])
+
+    # Every input is requested exactly once per stacker request it contributes to
+    assert [opPiper.accessCount for opPiper in opPipers] == [2 if 7 <= i < 41 else 1 for i in range(len(arrays))]
+    if coalesce_bytes:
+        # one bundle of adjacent inputs per worker thread
+        assert sorted(bundle_sizes) == [17, 17, 25, 25]
+    else:
+        assert bundle_sizes == []
+
+
 def testFullAllocate():
 
     nx = 5
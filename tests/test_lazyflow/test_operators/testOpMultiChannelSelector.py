@@ -3,6 +3,8 @@ import pytest
 import vigra
 
 from lazyflow.operators import OpArrayPiper, OpMultiChannelSelector
+from lazyflow.rtype import SubRegion
+from lazyflow.utility.testing import OpArrayPiperWithAccessCount
 
 
 @pytest.fixture
@@ -11,6 +13,24 @@ def random_data_5c():
     return vigra.taggedView(data, "yxc")
 
 
+@pytest.fixture(params=["in_memory", "requested"])
+def set_input(request, graph):
+    """
+    Provide input data either directly (gathered from memory)
+    or through an upstream operator (fetched with requests).
+    """
+
+    def _set_input(op, data):
+        if request.param == "in_memory":
+            op.Input.setValue(data)
+        else:
+            op_piper = OpArrayPiper(graph=graph)
+            op_piper.Input.setValue(data)
+            op.Input.connect(op_piper.Output)
+
+    return _set_input
+
+
 def test_raises_channel_not_last(graph):
     data = numpy.random.randint(0, 256, (10, 5, 1), dtype="uint8")
     vdata = vigra.taggedView(data, "yxz")
@@ -30,6 +50,14 @@ def test_notready_if_selected_channel_not_in_data(graph):
     assert not op.Output.ready()
 
 
+def test_notready_if_selected_channel_negative(graph, random_data_5c):
+    op = OpMultiChannelSelector(graph=graph)
+    op.Input.setValue(random_data_5c)
+    op.SelectedChannels.setValue([0, -1])
+
+    assert not op.Output.ready()
+
+
 def test_unready_if_selected_channel_not_in_data(graph):
     data = numpy.random.randint(0, 256, (10, 5, 2), dtype="uint8")
     vdata = vigra.taggedView(data, "yxc")
@@ -120,12 +148,102 @@ def test_selected_channel_change(graph, random_data_5c):
         (4, 2),
         (3, 2, 4),
         (1, 1, 1),
+        (0, 2, 1, 3, 3),
+        (2, 3, 0, 1),
+        (2, 1, 2, 1, 2),
     ],
 )
-def test_select_multi_channels(graph, selected_channels, random_data_5c):
+def test_select_multi_channels(graph, set_input, selected_channels, random_data_5c):
     op = OpMultiChannelSelector(graph=graph)
     op.SelectedChannels.setValue(selected_channels)
-    op.Input.setValue(random_data_5c)
+    set_input(op, random_data_5c)
+
+    output = op.Output[()].wait()
+    numpy.testing.assert_array_equal(output, random_data_5c[..., selected_channels])
+
+
+@pytest.mark.parametrize(
+    "selected_channels, expected_requests",
+    [
+        ((1, 2, 3), 1),
+        ((1, 1, 2, 2), 1),
+        ((4, 3, 2), 1),
+        ((0, 2, 4), 3),
+        ((0, 1, 3, 4), 2),
+    ],
+)
+def test_consecutive_channels_requested_together(graph, selected_channels, expected_requests, random_data_5c):
+    op_piper = OpArrayPiperWithAccessCount(graph=graph)
+    op_piper.Input.setValue(random_data_5c)
+
+    op = OpMultiChannelSelector(graph=graph)
+    op.Input.connect(op_piper.Output)
+    op.SelectedChannels.setValue(selected_channels)
+
+    output = op.Output[()].wait()
+    numpy.testing.assert_array_equal(output, random_data_5c[..., selected_channels])
+    assert op_piper.accessCount == expected_requests
+
+
+def test_request_channel_subset(graph, set_input, random_data_5c):
+    selected_channels = (3, 0, 4, 1, 1)
+    op = OpMultiChannelSelector(graph=graph)
+    set_input(op, random_data_5c)
+    op.SelectedChannels.setValue(selected_channels)
+
+    # second pass reuses the runs computed for each range in the first one
+    for _ in range(2):
+        for start, stop in [(0, 1), (1, 3), (2, 5), (4, 5), (1, 5), (0, 5)]:
+            output = op.Output[:, :, start:stop].wait()
+            numpy.testing.assert_array_equal(output, random_data_5c[..., selected_channels[start:stop]])
+
+
+def _count_requests(monkeypatch, slot):
+    """Record the rois requested from slot"""
+    requested_rois = []
+    get = slot.get
+
+    def counting_get(roi):
+        requested_rois.append(roi)
+        return get(roi)
+
+    monkeypatch.setattr(slot, "get", counting_get)
+    return requested_rois
+
+
+@pytest.mark.parametrize("dtype", [numpy.uint8, numpy.float32])
+def test_in_memory_input_not_requested(graph, monkeypatch, dtype, random_data_5c):
+    selected_channels = (3, 0, 4, 1, 1)
+
+    # input slot connected to an input slot holding the data: it is gathered without requests
+    op_piper = OpArrayPiper(graph=graph)
+    op_piper.Input.setValue(random_data_5c)
+    op = OpMultiChannelSelector(graph=graph)
+    op.Input.connect(op_piper.Input)
+    op.SelectedChannels.setValue(selected_channels)
+    requested_rois = _count_requests(monkeypatch, op.Input)
+
+    # destination of a different dtype is converted like for requested data
+    roi = SubRegion(op.Output, start=(2, 1, 1), stop=(7, 4, 5))
+    result = numpy.zeros((5, 3, 4), dtype=dtype)
+    op.execute(op.Output, (), roi, result)
+
+    numpy.testing.assert_array_equal(result, random_data_5c[2:7, 1:4, selected_channels[1:5]])
+    assert requested_rois == []
+
+
+def test_upstream_input_requested(graph, monkeypatch, random_data_5c):
+    selected_channels = (3, 0, 4, 1, 1)
+
+    op_piper = OpArrayPiper(graph=graph)
+    op_piper.Input.setValue(random_data_5c)
+    op = OpMultiChannelSelector(graph=graph)
+    op.Input.connect(op_piper.Output)
+    op.SelectedChannels.setValue(selected_channels)
+    requested_rois = _count_requests(monkeypatch, op.Input)
 
     output = op.Output[()].wait()
+
     numpy.testing.assert_array_equal(output, random_data_5c[..., selected_channels])
+    # one request per run of consecutive input channels: 0-1 and 3-4
+    assert len(requested_rois) == 2
@@ -0,0 +1,35 @@
+import numpy
+import pytest
+import vigra
+
+from lazyflow.operators import OpArrayPiper, OpPixelOperator
+
+
+def _double_in_place(x):
+    x *= 2
+    return x
+
+
+@pytest.mark.parametrize(
+    "function",
+    [
+        numpy.sqrt,
+        numpy.negative,
+        lambda x: x * 2,
+        lambda x: (x > 100).astype(numpy.uint8),
+        _double_in_place,
+    ],
+)
+@pytest.mark.parametrize("dtype", [numpy.uint8, numpy.float32])
+def test_pixel_operator(graph, function, dtype):
+    data = numpy.random.randint(0, 256, (10, 20, 2)).astype(dtype)
+
+    op_piper = OpArrayPiper(graph=graph)
+    op_piper.Input.setValue(vigra.taggedView(data, "yxc"))
+
+    op = OpPixelOperator(graph=graph, Input=op_piper.Output, Function=function)
+
+    expected = function(data[2:7, 5:15, :].copy())
+    output = op.Output[2:7, 5:15, :].wait()
+    assert output.dtype == expected.dtype
+    numpy.testing.assert_array_equal(output, expected)